@@ -1,21 +1,32 @@
 from agent import Agent
+from bisect import bisect_left, insort
+from collections import Counter, deque
 import random
 
 class StudentAgent(Agent):
     '''An advanced agent with adaptive learning and dynamic strategy to outperform others.'''
 
+    # Safeguard cap on vote and mission history. A game has at most 25 votes and 5 missions and
+    # new_game resets both, so this only bounds memory if the agent is driven without new_game
+    history_length = 64
+
     def __init__(self, name='StudentAgent'):
         '''Initializes the agent with suspicion tracking, game memory, and agent properties.'''
         self.name = name
-        self.suspicion = {}
+        self.suspicion = []
+        self.suspicion_order = []
         self.known_spies = set()
-        self.vote_history = []
-        self.mission_history = []
+        self.vote_history = deque(maxlen=self.history_length)
+        self.mission_history = deque(maxlen=self.history_length)
+        self.failed_mission_count = {}
         self.successful_missions = 0
         self.failed_missions = 0
+        self.suspicion_threshold = 0.3  # Average suspicion above which the resistance rejects a team
         self.number_of_players = 0
         self.player_number = 0
-        self.spy_list = []
+        self.other_players = ()
+        self.spy_list = ()
+        self.spy_set = frozenset()
         self.is_spy_player = False
         self.suspected_spies = []
         self.suspected_loyalists = []  
@@ -24,100 +35,137 @@ class StudentAgent(Agent):
         '''Initializes the game state.'''
         self.number_of_players = number_of_players
         self.player_number = player_number
-        self.spy_list = spy_list
-        self.is_spy_player = self.player_number in self.spy_list
-        # Suspicion tracking for other players
-        self.suspicion = {player: 0.0 for player in range(self.number_of_players) if player != self.player_number}
+        self.other_players = tuple(player for player in range(number_of_players) if player != player_number)
+        self.spy_list = tuple(spy_list)  # Public record of the spies; decisions use spy_set
+        self.spy_set = frozenset(spy_list)  # Constant-time spy membership checks
+        self.is_spy_player = self.player_number in self.spy_set
+        # Suspicion tracking for other players, indexed by player number (own entry is never read)
+        self.suspicion = [0.0] * self.number_of_players
+        # (suspicion, player) pairs for other players, kept sorted from least to most suspicious
+        self.suspicion_order = [(0.0, player) for player in self.other_players]
         self.known_spies = set()
-        self.vote_history = []
-        self.mission_history = []
+        self.vote_history = deque(maxlen=self.history_length)
+        self.mission_history = deque(maxlen=self.history_length)
+        # Number of failed missions each player has been part of
+        self.failed_mission_count = {player: 0 for player in range(self.number_of_players)}
         self.successful_missions = 0
         self.failed_missions = 0
+        self.suspicion_threshold = 0.3  # Average suspicion above which the resistance rejects a team
 
     def is_spy(self):
         '''Returns True if the agent is a spy.'''
         return self.is_spy_player
 
+    def _set_suspicion(self, player, value):
+        '''Sets a player's suspicion level, keeping the ordered suspicion index in sync.'''
+        old_value = self.suspicion[player]
+        if value == old_value:
+            return
+        del self.suspicion_order[bisect_left(self.suspicion_order, (old_value, player))]
+        insort(self.suspicion_order, (value, player))
+        self.suspicion[player] = value
+
     def propose_mission(self, team_size, betrayals_required):
         '''Proposes a mission team based on suspicion levels and game context.'''
-        # Spy strategy: Build trust by selecting a mix of spies and non-spies
-        if self.is_spy():
-            team = [self.player_number]  # Always include self as a spy
-            candidates = [p for p in range(self.number_of_players) if p != self.player_number]
-            random.shuffle(candidates)  # Shuffle to add unpredictability
-            spies_in_team = 1  # Start with one spy (self)
-            # Add spies strategically but avoid filling the team with only spies
-            for player in candidates:
-                if len(team) >= team_size:
-                    break
-                if player in self.spy_list and spies_in_team < betrayals_required:
-                    team.append(player)
-                    spies_in_team += 1
-            # Fill the remaining slots with non-spies to reduce suspicion
-            non_spies_candidates = [p for p in candidates if p not in self.spy_list]
-            random.shuffle(non_spies_candidates)  # Shuffle non-spies for unpredictability
-            for player in non_spies_candidates:
-                if len(team) >= team_size:
-                    break
+        if self.is_spy_player:
+            return self._propose_spy(team_size, betrayals_required)
+        return self._propose_resistance(team_size, betrayals_required)
+
+    def _propose_spy(self, team_size, betrayals_required):
+        '''Spy strategy: Build trust by selecting a mix of spies and non-spies.'''
+        team = [self.player_number]  # Always include self as a spy
+        candidates = list(self.other_players)
+        random.shuffle(candidates)  # Shuffle to add unpredictability
+        spies_in_team = 1  # Start with one spy (self)
+        non_spies_candidates = []
+        # Add spies strategically but avoid filling the team with only spies,
+        # setting non-spies aside in shuffled order as we go
+        for player in candidates:
+            if player not in self.spy_set:
+                non_spies_candidates.append(player)
+            elif spies_in_team < betrayals_required and len(team) < team_size:
                 team.append(player)
-            return team[:team_size]  # Return the selected team, ensuring correct size
-        # Resistance strategy: Select least suspicious players and avoid known spies
-        else:
-            team = [self.player_number]  # Always include self in the team
-            candidates = sorted(self.suspicion.keys(), key=lambda x: self.suspicion[x])  # Sort by suspicion level (low to high)
-            # Prioritize players with low suspicion and those not involved in failed missions
-            for player in candidates:
+                spies_in_team += 1
+        # Fill the remaining slots with non-spies to reduce suspicion
+        team.extend(non_spies_candidates[:team_size - len(team)])
+        return team[:team_size]  # Return the selected team, ensuring correct size
+
+    def _propose_resistance(self, team_size, betrayals_required):
+        '''Resistance strategy: Select least suspicious players and avoid known spies.'''
+        team = [self.player_number]  # Always include self in the team
+        # suspicion_order is kept sorted (low to high), so only its head is walked until the team is full
+        # Prioritize players with low suspicion and those not involved in failed missions
+        for _, player in self.suspicion_order:
+            if len(team) >= team_size:
+                break
+            if player not in self.known_spies:
+                # Check player's involvement in failed missions
+                if self.failed_mission_count[player] == 0:  # Avoid players frequently in failed missions
+                    team.append(player)
+        # If not enough low-suspicion players, fill remaining slots with the next least suspicious players
+        if len(team) < team_size:
+            for _, player in self.suspicion_order:
                 if len(team) >= team_size:
                     break
-                if player not in self.known_spies:
-                    # Check player's involvement in failed missions
-                    failed_missions = sum(1 for mission in self.mission_history if not mission['success'] and player in mission['mission'])
-                    if failed_missions == 0:  # Avoid players frequently in failed missions
-                        team.append(player)
-            # If not enough low-suspicion players, fill remaining slots with the next least suspicious players
-            if len(team) < team_size:
-                remaining_candidates = [p for p in candidates if p not in team and p not in self.known_spies]
-                for player in remaining_candidates:
-                    if len(team) >= team_size:
-                        break
+                if player not in team and player not in self.known_spies:
                     team.append(player)
-            return team[:team_size]  # Return the selected team, ensuring correct size
+        return team[:team_size]  # Return the selected team, ensuring correct size
 
     def vote(self, mission, proposer, betrayals_required):
         '''Votes on the proposed mission based on suspicion, voting history, and game context.'''
-        if self.is_spy():
-            # Spy strategy: Early game, vote to blend in; later game, block good missions
-            if any(player in self.spy_list for player in mission):
-                return True  # Support missions with spies
-            # Randomize some votes to avoid obvious spy behavior
-            return random.random() < 0.6
-        else:
-            # Resistance strategy: Reject missions proposed by suspicious players or containing spies
-            if proposer in self.known_spies or any(player in self.known_spies for player in mission):
-                return False
-            # Calculate mission risk based on the suspicion of team members
-            avg_suspicion = sum(self.suspicion[player] for player in mission if player != self.player_number) / (len(mission) - 1)
-            suspicion_threshold = 0.3 + (0.1 * self.failed_missions)  # Increase tolerance as game progresses
-            return avg_suspicion < suspicion_threshold
+        if self.is_spy_player:
+            return self._vote_spy(mission, proposer, betrayals_required)
+        return self._vote_resistance(mission, proposer, betrayals_required)
+
+    def _vote_spy(self, mission, proposer, betrayals_required):
+        '''Spy strategy: Early game, vote to blend in; later game, block good missions.'''
+        if not self.spy_set.isdisjoint(mission):
+            return True  # Support missions with spies
+        # Randomize some votes to avoid obvious spy behavior
+        return random.random() < 0.6
+
+    def _vote_resistance(self, mission, proposer, betrayals_required):
+        '''Resistance strategy: Reject missions proposed by suspicious players or containing spies.'''
+        if proposer in self.known_spies or not self.known_spies.isdisjoint(mission):
+            return False
+        # Calculate mission risk based on the average suspicion of the other team members
+        others = len(mission) - (self.player_number in mission)
+        if others == 0:
+            return True  # Nobody else on the team to distrust
+        # Suspicion is never negative, so stop as soon as the running total reaches the limit
+        limit = self.suspicion_threshold * others
+        total = 0.0
+        for player in mission:
+            if player != self.player_number:
+                total += self.suspicion[player]
+                if total >= limit:
+                    return False
+        return True
     
     def vote_outcome(self, mission, proposer, votes):
         '''Updates internal state based on voting outcome.'''
         self.vote_history.append({'mission': mission, 'proposer': proposer, 'votes': votes})
-        for player, vote in enumerate(votes):
-            if vote and player != self.player_number and player in mission:
-                self.suspicion[player] += 0.05  # Slightly increase suspicion for consistent supporters
-                self.suspicion[player] = min(1.0, self.suspicion[player])
+        suspicion = self.suspicion
+        supporters = set(votes)  # The game passes the ids of the players who voted for the team
+        # Only team members can be affected, so walk the team rather than every vote
+        for player in mission:
+            if player in supporters and player != self.player_number:
+                self._set_suspicion(player, min(1.0, suspicion[player] + 0.05))  # Slightly increase suspicion for consistent supporters
     
     def betray(self, mission, proposer, betrayals_required):    # added betray based on team spy composition
         '''Refined betrayal strategy that factors in team composition and mission stage.'''
-        if not self.is_spy():
-            return False
+        if self.is_spy_player:
+            return self._betray_spy(mission, proposer, betrayals_required)
+        return False  # Resistance members never betray
+
+    def _betray_spy(self, mission, proposer, betrayals_required):
+        '''Betrays based on game stage and team composition.'''
         # If near game-end and critical missions, betray strategically
         if self.failed_missions == 2 or self.successful_missions == 2:
             return True  # High priority betrayal
         # Evaluate mission composition
-        spy_count_in_mission = len(set(mission) & set(self.spy_list))
-        non_spy_count_in_mission = len([p for p in mission if p not in self.spy_list])
+        spy_count_in_mission = len(self.spy_set.intersection(mission))
+        non_spy_count_in_mission = sum(1 for p in mission if p not in self.spy_set)
         # If the team has mostly loyalists and low suspicion spies, betray
         if non_spy_count_in_mission >= betrayals_required and spy_count_in_mission >= 1:
             return True
@@ -129,50 +177,59 @@ class StudentAgent(Agent):
 
     def mission_outcome(self, mission, proposer, num_betrayals, mission_success):
         '''Updates internal state based on mission outcome.'''
-        self.mission_history.append({'mission': mission, 'proposer': proposer, 'num_betrayals': num_betrayals, 'success': mission_success})
-
-        if self.is_spy():
-            return  # Spies do not need to track suspicion
+        # Spies still keep the history for game_outcome; everything below is resistance-only
+        self.mission_history.append({'mission': mission, 'mission_set': frozenset(mission), 'proposer': proposer, 'num_betrayals': num_betrayals, 'success': mission_success})
+        if self.is_spy_player:
+            return  # Spies do not need to track suspicion or failed-mission counts
+        if not mission_success:
+            for player in mission:
+                self.failed_mission_count[player] += 1
         # Adjust suspicion based on mission outcome
+        suspicion = self.suspicion
+        known_spies = self.known_spies
+        potential_spies = [p for p in mission if p != self.player_number and p not in known_spies]
         if not mission_success:
             # Mission failed: Increase suspicion on non-self players
-            potential_spies = [p for p in mission if p != self.player_number and p not in self.known_spies]
-            if len(potential_spies) > 0:
+            if potential_spies:
                 increment = num_betrayals / len(potential_spies)
                 for player in potential_spies:
-                    self.suspicion[player] += increment
-                    self.suspicion[player] = min(1.0, self.suspicion[player])
-                    if self.suspicion[player] > 0.7:
-                        self.known_spies.add(player)  # Confirm player as a spy
+                    level = min(1.0, suspicion[player] + increment)
+                    self._set_suspicion(player, level)
+                    if level > 0.7:
+                        known_spies.add(player)  # Confirm player as a spy
         else:
             # Mission succeeded: Decrease suspicion on non-self players
-            for player in mission:
-                if player != self.player_number and player not in self.known_spies:
-                    self.suspicion[player] = max(0.0, self.suspicion[player] - 0.1)
+            for player in potential_spies:
+                self._set_suspicion(player, max(0.0, suspicion[player] - 0.1))
 
     def round_outcome(self, rounds_complete, missions_failed):
         '''Updates internal counters after each round.'''
         self.successful_missions = rounds_complete - missions_failed
         self.failed_missions = missions_failed
+        self.suspicion_threshold = 0.3 + (0.1 * missions_failed)  # Increase tolerance as game progresses
 
     def game_outcome(self, spies_win, spies):
         '''Handles the game outcome, refining the loyalist strategy based on victory or defeat.'''
+        others = set(self.other_players)
+        if self.is_spy_player:
+            # Spy strategy: Adjust suspicion on fellow spies based on success/failure
+            eligible = others & self.spy_set
+            counted_outcomes = {not spies_win}  # Failed missions if spies won, successful ones otherwise
+            step = -0.3 if spies_win else 0.3
+        elif spies_win:
+            # Loyalist strategy: If spies won, increase suspicion on players involved in failed missions
+            eligible = others - self.known_spies
+            counted_outcomes = {False}
+            step = 0.3
+        else:
+            # If Resistance won, decrease suspicion on wrongly accused players
+            eligible = others.difference(spies)
+            counted_outcomes = {True, False}
+            step = -0.2
+        # Count each player's appearances in the relevant missions, then apply one clipped update per player
+        appearances = Counter()
         for mission in self.mission_history:
-            for player in mission['mission']:
-                if self.is_spy():
-                    # Spy strategy: Adjust suspicion based on success/failure
-                    if spies_win and not mission['success'] and player in self.spy_list and player != self.player_number:
-                        self.suspicion[player] = max(0.0, self.suspicion[player] - 0.3)
-                    elif not spies_win and mission['success'] and player in self.spy_list and player != self.player_number:
-                        self.suspicion[player] = min(1.0, self.suspicion[player] + 0.3)
-                else:
-                    # Loyalist strategy: Adjust suspicion based on game outcome
-                    if spies_win:
-                        # If spies won, increase suspicion on players involved in failed missions
-                        if not mission['success']:
-                            if player != self.player_number and player not in self.known_spies:
-                                self.suspicion[player] = min(1.0, self.suspicion[player] + 0.3)
-                    else:
-                        # If Resistance won, decrease suspicion on wrongly accused players
-                        if player not in spies and player != self.player_number:
-                            self.suspicion[player] = max(0.0, self.suspicion[player] - 0.2)
\ No newline at end of file
+            if mission['success'] in counted_outcomes:
+                appearances.update(mission['mission_set'] & eligible)
+        for player, count in appearances.items():
+            self._set_suspicion(player, min(1.0, max(0.0, self.suspicion[player] + step * count)))